@@ -2,15 +2,16 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from tkinter.scrolledtext import ScrolledText
 import os
-import whisper
 import threading
 import torch
 import queue
-from transformers import pipeline
 import time
-import ffmpeg
 from datetime import timedelta
 from ttkthemes import ThemedTk
+from extractive import extractive_summary, prefilter_text
+from meeting import get_video_duration, extract_audio_chunk
+from scheduler import get_scheduler, describe_peaks
+from weight_store import load_whisper_model, load_summarizer
 
 class AutoScrollbar(ttk.Scrollbar):
     """Scrollbar that automatically hides when not needed"""
@@ -241,6 +242,58 @@ class AudioTranscriptionApp:
                           variable=self.chunk_size_var, 
                           value=value).pack(side=tk.LEFT, padx=(0, 15), pady=3)
         
+        # Summary mode section
+        summary_mode_frame = ttk.Frame(settings_frame, style="TFrame")
+        summary_mode_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        ttk.Label(summary_mode_frame, 
+                text="Summary Mode:", 
+                font=("Segoe UI", 11),
+                foreground=self.colors["text_primary"],
+                background=self.colors["background"]).pack(anchor=tk.W, pady=(0, 5))
+        
+        self.summary_mode_var = tk.StringVar(value="best")
+        summary_modes = [
+            ("Fast (Extractive)", "fast", "Key sentences only, near-instant"),
+            ("Balanced", "balanced", "Key sentences, then BART"),
+            ("Best (BART)", "best", "BART over the whole transcript")
+        ]
+        
+        summary_options_frame = ttk.Frame(summary_mode_frame, style="TFrame")
+        summary_options_frame.pack(fill=tk.X, padx=(10, 0))
+        
+        for text, value, tooltip in summary_modes:
+            mode_radio_frame = ttk.Frame(summary_options_frame, style="TFrame")
+            mode_radio_frame.pack(anchor=tk.W, pady=3)
+            
+            ttk.Radiobutton(mode_radio_frame, 
+                          text=text, 
+                          variable=self.summary_mode_var, 
+                          value=value).pack(side=tk.LEFT)
+            
+            ttk.Label(mode_radio_frame, 
+                    text=f"({tooltip})", 
+                    foreground=self.colors["text_secondary"],
+                    background=self.colors["background"],
+                    font=("Segoe UI", 9)).pack(side=tk.LEFT, padx=5)
+        
+        budget_frame = ttk.Frame(summary_mode_frame, style="TFrame")
+        budget_frame.pack(fill=tk.X, padx=(10, 0), pady=(5, 0))
+        
+        ttk.Label(budget_frame, 
+                text="Summary time limit (s, 0 = none):", 
+                foreground=self.colors["text_secondary"],
+                background=self.colors["background"],
+                font=("Segoe UI", 9)).pack(side=tk.LEFT)
+        
+        self.summary_budget_var = tk.StringVar(value="0")
+        ttk.Spinbox(budget_frame, 
+                  from_=0, 
+                  to=3600, 
+                  increment=30, 
+                  width=6, 
+                  textvariable=self.summary_budget_var).pack(side=tk.LEFT, padx=5)
+        
         # Add separator
         ttk.Separator(left_panel, orient=tk.HORIZONTAL).pack(fill=tk.X, pady=20)
         
@@ -394,33 +447,25 @@ class AudioTranscriptionApp:
     def get_video_duration(self, video_path):
         """Get the duration of the video using ffmpeg"""
         try:
-            probe = ffmpeg.probe(video_path)
-            duration = float(probe['streams'][0]['duration'])
-            return duration
+            return get_video_duration(video_path)
         except Exception as e:
             messagebox.showerror("Error", f"Could not get video duration: {str(e)}")
             return None
 
     def extract_audio_chunk(self, video_path, start_time, chunk_duration):
         """Extract a chunk of audio from the video"""
-        try:
-            temp_chunk = f"temp_chunk_{start_time}.wav"
-            (
-                ffmpeg
-                .input(video_path, ss=start_time, t=chunk_duration)
-                .output(temp_chunk, acodec='pcm_s16le', ac=1, ar=16000)
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
-            )
+        temp_chunk = f"temp_chunk_{start_time}.wav"
+        if extract_audio_chunk(video_path, start_time, chunk_duration, temp_chunk):
             return temp_chunk
-        except Exception as e:
-            self.update_ui(status=f"Error extracting audio chunk: {str(e)}")
-            return None
+        self.update_ui(status="Error extracting audio chunk")
+        return None
 
     def process_file(self):
         try:
             file_path = self.file_path.get()
             chunk_duration = int(self.chunk_size_var.get())
+            # Only this job's CPU allocation goes in its metrics
+            metrics_mark = get_scheduler().mark()
             
             # Get total duration
             duration = self.get_video_duration(file_path)
@@ -430,11 +475,18 @@ class AudioTranscriptionApp:
             # Load models if needed
             if not self.whisper_model:
                 self.update_ui(status="Loading Whisper model...", progress=0, step="Initializing model...")
-                self.whisper_model = whisper.load_model(self.model_var.get())
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+                self.whisper_model = load_whisper_model(self.model_var.get(), device=device)
+            
+            summary_mode = self.summary_mode_var.get()
+            try:
+                summary_budget = float(self.summary_budget_var.get()) or None
+            except ValueError:
+                summary_budget = None
             
-            if not self.summarizer:
+            if not self.summarizer and summary_mode != "fast":
                 self.update_ui(status="Loading summarizer...", progress=5, step="Initializing summarizer...")
-                self.summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+                self.summarizer = load_summarizer("facebook/bart-large-cnn")
             
             # Process in chunks
             full_transcript = ""
@@ -442,36 +494,40 @@ class AudioTranscriptionApp:
             chunk_count = 0
             total_chunks = int(duration / chunk_duration) + 1
             
-            while start_time < duration and not self.cancelled:
-                current_chunk = min(chunk_duration, duration - start_time)
-                progress = (start_time / duration) * 70  # Use 70% of progress bar for transcription
+            scheduler = get_scheduler()
+            with scheduler.stage("whisper"):
+                while start_time < duration and not self.cancelled:
+                    # Take up any rebalance since the last chunk
+                    scheduler.apply()
+                    current_chunk = min(chunk_duration, duration - start_time)
+                    progress = (start_time / duration) * 70  # Use 70% of progress bar for transcription
                 
-                self.update_ui(
-                    status=f"Processing chunk {chunk_count + 1}/{total_chunks}",
-                    progress=progress,
-                    step=f"Transcribing {timedelta(seconds=int(start_time))} to {timedelta(seconds=int(start_time + current_chunk))}"
-                )
+                    self.update_ui(
+                        status=f"Processing chunk {chunk_count + 1}/{total_chunks}",
+                        progress=progress,
+                        step=f"Transcribing {timedelta(seconds=int(start_time))} to {timedelta(seconds=int(start_time + current_chunk))}"
+                    )
                 
-                # Extract and transcribe chunk
-                temp_chunk = self.extract_audio_chunk(file_path, start_time, current_chunk)
-                if temp_chunk:
-                    try:
-                        result = self.whisper_model.transcribe(temp_chunk)
-                        timestamp = str(timedelta(seconds=int(start_time)))
-                        chunk_text = f"[{timestamp}] {result['text']}\n\n"
+                    # Extract and transcribe chunk
+                    temp_chunk = self.extract_audio_chunk(file_path, start_time, current_chunk)
+                    if temp_chunk:
+                        try:
+                            result = self.whisper_model.transcribe(temp_chunk)
+                            timestamp = str(timedelta(seconds=int(start_time)))
+                            chunk_text = f"[{timestamp}] {result['text']}\n\n"
                         
-                        # Update transcription immediately
-                        self.output_text.insert(tk.END, chunk_text)
-                        self.output_text.see(tk.END)
-                        full_transcript += chunk_text
+                            # Update transcription immediately
+                            self.output_text.insert(tk.END, chunk_text)
+                            self.output_text.see(tk.END)
+                            full_transcript += chunk_text
                         
-                        # Clean up temp file
-                        os.remove(temp_chunk)
-                    except Exception as e:
-                        self.update_ui(status=f"Error processing chunk: {str(e)}")
+                            # Clean up temp file
+                            os.remove(temp_chunk)
+                        except Exception as e:
+                            self.update_ui(status=f"Error processing chunk: {str(e)}")
                 
-                start_time += chunk_duration
-                chunk_count += 1
+                    start_time += chunk_duration
+                    chunk_count += 1
             
             if self.cancelled:
                 raise Exception("Processing cancelled by user")
@@ -479,24 +535,40 @@ class AudioTranscriptionApp:
             # Generate summary
             if full_transcript:
                 self.update_ui(progress=80, status="Generating summary...", step="Creating summary...")
-                chunks = [full_transcript[i:i + 1000] for i in range(0, len(full_transcript), 1000)]
-                summary_texts = []
-                
-                for i, chunk in enumerate(chunks):
-                    if self.cancelled:
-                        break
-                    summary = self.summarizer(chunk, max_length=150, min_length=30, do_sample=False)
-                    summary_texts.append(summary[0]['summary_text'])
-                    self.update_ui(
-                        progress=80 + (i / len(chunks)) * 20,
-                        step=f"Summarizing part {i+1}/{len(chunks)}"
-                    )
-                
-                final_summary = " ".join(summary_texts)
+                if summary_mode == "fast":
+                    final_summary = extractive_summary(full_transcript)
+                else:
+                    summary_source = full_transcript
+                    if summary_mode == "balanced":
+                        # Only the most salient sentences go through BART
+                        summary_source = prefilter_text(full_transcript, 2400)
+                    
+                    with scheduler.stage("summarizer"):
+                        chunks = [summary_source[i:i + 1000] for i in range(0, len(summary_source), 1000)]
+                        summary_texts = []
+                        summary_started = time.monotonic()
+                    
+                        for i, chunk in enumerate(chunks):
+                            if self.cancelled:
+                                break
+                            if summary_budget and time.monotonic() - summary_started > summary_budget:
+                                # Out of time: finish the remaining parts extractively
+                                summary_texts.append(extractive_summary(summary_source[i * 1000:]))
+                                break
+                            scheduler.apply()
+                            summary = self.summarizer(chunk, max_length=150, min_length=30, do_sample=False)
+                            summary_texts.append(summary[0]['summary_text'])
+                            self.update_ui(
+                                progress=80 + (i / len(chunks)) * 20,
+                                step=f"Summarizing part {i+1}/{len(chunks)}"
+                            )
+                    
+                    final_summary = " ".join(summary_texts)
                 self.summary_text.delete(1.0, tk.END)
                 self.summary_text.insert(tk.END, final_summary)
             
-            self.update_ui(progress=100, status="Processing completed", step="Done")
+            metrics = get_scheduler().metrics(since=metrics_mark)
+            self.update_ui(progress=100, status="Processing completed", step=f"Done (CPU threads: {describe_peaks(metrics)})")
             
         except Exception as e:
             if not self.cancelled:
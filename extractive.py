@@ -0,0 +1,121 @@
+import re
+import numpy as np
+
+TIMESTAMP_PATTERN = re.compile(r"\[\d+:\d{2}:\d{2}\]")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Very common words that carry no topic information
+STOP_WORDS = frozenset("""
+a about after all also am an and any are as at be because been but by can could
+did do does doing for from had has have he her here him his how i if in into is
+it its just like me my no not now of on one or our out over really right she so
+some than that the their them then there these they this to up us very was we
+well were what when which who will with would yeah yes you your okay um uh
+""".split())
+
+def split_sentences(text, min_words=4):
+    """Split a transcript into sentences, dropping timestamps and fragments"""
+    text = TIMESTAMP_PATTERN.sub(" ", text)
+    sentences = []
+    for sentence in SENTENCE_PATTERN.split(text):
+        sentence = " ".join(sentence.split())
+        if len(sentence.split()) >= min_words:
+            sentences.append(sentence)
+    return sentences
+
+def tfidf_matrix(sentences):
+    """Build an L2-normalised sentence x term TF-IDF matrix"""
+    tokenized = [
+        [word for word in WORD_PATTERN.findall(sentence.lower()) if word not in STOP_WORDS]
+        for sentence in sentences
+    ]
+    vocabulary = {}
+    rows, cols = [], []
+    for row, words in enumerate(tokenized):
+        for word in words:
+            rows.append(row)
+            cols.append(vocabulary.setdefault(word, len(vocabulary)))
+
+    matrix = np.zeros((len(sentences), max(1, len(vocabulary))), dtype=np.float32)
+    np.add.at(matrix, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), 1.0)
+
+    document_frequency = np.count_nonzero(matrix, axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1.0
+    matrix *= idf.astype(np.float32)
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def textrank_scores(matrix, damping=0.85, iterations=50, tolerance=1e-6):
+    """Score sentences with PageRank over their cosine-similarity graph"""
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, 0.0)
+
+    # Row-normalise into transition probabilities; isolated sentences jump anywhere
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    count = similarity.shape[0]
+    transition = np.where(out_weight > 0, similarity / np.where(out_weight > 0, out_weight, 1.0), 1.0 / count)
+
+    scores = np.full(count, 1.0 / count, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1 - damping) / count + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < tolerance:
+            return updated
+        scores = updated
+    return scores
+
+def rank_sentences(sentences, method="textrank"):
+    """Return sentence indices ordered from most to least salient"""
+    if not sentences:
+        return []
+    matrix = tfidf_matrix(sentences)
+    if method == "textrank":
+        scores = textrank_scores(matrix)
+    elif method == "tfidf":
+        # Closeness to the transcript's overall term profile
+        scores = matrix @ matrix.mean(axis=0)
+    else:
+        raise ValueError(f"Unknown extractive method: {method}")
+    return list(np.argsort(-scores, kind="stable"))
+
+def _split_long_sentences(sentences, max_words):
+    """Cut sentences longer than `max_words` into windows so each one can be picked"""
+    pieces = []
+    for sentence in sentences:
+        words = sentence.split()
+        for i in range(0, len(words), max_words):
+            pieces.append(" ".join(words[i:i + max_words]))
+    return pieces
+
+def select_sentences(sentences, max_words, method="textrank"):
+    """Pick the most salient sentences within `max_words`, kept in transcript order"""
+    # Whisper can emit long unpunctuated stretches; never let them make the result empty
+    max_words = max(1, max_words)
+    sentences = _split_long_sentences(sentences, max_words)
+    chosen = []
+    total_words = 0
+    for index in rank_sentences(sentences, method):
+        length = len(sentences[index].split())
+        if total_words + length > max_words:
+            continue
+        chosen.append(index)
+        total_words += length
+    return [sentences[index] for index in sorted(chosen)]
+
+def extractive_summary(text, max_words=150, method="textrank"):
+    """Fast summary made of the transcript's most salient sentences"""
+    sentences = split_sentences(text)
+    if not sentences:
+        return text.strip()
+    return " ".join(select_sentences(sentences, max_words, method))
+
+def prefilter_text(text, max_words, method="textrank"):
+    """Shrink a transcript to its most salient sentences before abstractive summarization"""
+    if len(text.split()) <= max_words:
+        return text
+    sentences = split_sentences(text)
+    if not sentences:
+        return text
+    return " ".join(select_sentences(sentences, max_words, method))
@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import socket
+import threading
+from contextlib import contextmanager
+
+# Lock files are created atomically with O_EXCL and hold their owner and a
+# heartbeat time. A lock whose heartbeat stops (host killed, out of memory,
+# SIGKILL) goes stale and can be reclaimed by anyone else.
+
+@contextmanager
+def atomic_replace(path):
+    """Yield a temporary path that replaces `path` once the block succeeds.
+
+    Readers see either the old file or the complete new one, never a partial write.
+    """
+    temp_path = f"{path}.{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield temp_path
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def _holder():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def pid_alive(pid):
+    """Whether a process on this host is still running"""
+    if os.name == "nt":
+        return True  # os.kill(pid, 0) would send CTRL_C_EVENT; rely on the heartbeat
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists, owned by another user
+    return True
+
+def read_lock(path):
+    """Lock contents, or None if it is gone or still being written"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def lock_is_stale(path, stale_after):
+    """A lock is stale when its heartbeat is too old or its owner on this host has exited"""
+    info = read_lock(path)
+    if info is None:
+        # Half-written or unreadable: judge by the file's age instead
+        try:
+            return time.time() - os.path.getmtime(path) > stale_after
+        except FileNotFoundError:
+            return False
+    if time.time() - info.get("heartbeat", 0) > stale_after:
+        return True
+    return info.get("host") == socket.gethostname() and not pid_alive(info.get("pid", 0))
+
+def _write_lock(path, fd=None):
+    data = json.dumps({
+        "holder": _holder(),
+        "host": socket.gethostname(),
+        "pid": os.getpid(),
+        "heartbeat": time.time(),
+    })
+    if fd is not None:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        return
+    with atomic_replace(path) as temp_path:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+
+def acquire_lock(path, stale_after=60):
+    """Try once to take a lock, reclaiming it if stale; returns True on success"""
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if not lock_is_stale(path, stale_after):
+                return False
+            # Rename first so only one of several reclaimers removes it
+            reclaimed = f"{path}.{socket.gethostname()}.{os.getpid()}.stale"
+            try:
+                os.replace(path, reclaimed)
+            except FileNotFoundError:
+                continue
+            os.remove(reclaimed)
+            print(f"[!] Reclaimed stale lock {path}")
+            continue
+        _write_lock(path, fd)
+        return True
+    return False
+
+def refresh_lock(path):
+    """Update the heartbeat of a lock we hold; returns False if we lost it"""
+    info = read_lock(path)
+    if info is None or info.get("holder") != _holder():
+        return False
+    _write_lock(path)
+    return True
+
+def release_lock(path):
+    """Remove a lock if we still hold it"""
+    info = read_lock(path)
+    if info is not None and info.get("holder") == _holder():
+        os.remove(path)
+
+class LockHeartbeat:
+    """Keep a held lock fresh from a background thread while work runs"""
+
+    def __init__(self, path, interval=10):
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not refresh_lock(self.path):
+                print(f"[!] Lost lock {self.path}")
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
@@ -0,0 +1,77 @@
+import os
+import json
+import time
+import ffmpeg
+from extractive import extractive_summary, prefilter_text
+from scheduler import get_scheduler, describe_peaks
+from weight_store import load_summarizer
+
+def get_video_duration(video_path):
+    """Get the duration of the video using ffmpeg"""
+    probe = ffmpeg.probe(video_path)
+    duration = float(probe['streams'][0]['duration'])
+    return duration
+
+def extract_audio_chunk(video_path, start_time, chunk_duration, output_audio):
+    """Extract a chunk of audio from the video"""
+    print(f"[*] Extracting audio chunk from {start_time}s to {start_time + chunk_duration}s...")
+    try:
+        (
+            ffmpeg
+            .input(video_path, ss=start_time, t=chunk_duration)
+            .output(output_audio, acodec='pcm_s16le', ac=1, ar=16000)
+            .overwrite_output()
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+        return True
+    except ffmpeg.Error as e:
+        print(f"Error extracting audio chunk: {e.stderr.decode()}")
+        return False
+
+def summarize_text(text, max_words=800, mode="best", prefilter_words=2400, time_budget=None):
+    """Summarize a transcript.
+
+    mode is "fast" (extractive only), "balanced" (extractive pre-filter, then
+    BART on what is left) or "best" (BART over the whole transcript). When
+    time_budget (seconds) runs out, remaining chunks fall back to extractive.
+    """
+    if mode == "fast":
+        print("[*] Summarizing transcript with extractive TextRank...")
+        return extractive_summary(text)
+
+    if mode == "balanced":
+        text = prefilter_text(text, prefilter_words)
+
+    print("[*] Summarizing transcript with Transformers...")
+    scheduler = get_scheduler()
+    with scheduler.stage("summarizer"):
+        summarizer = load_summarizer("facebook/bart-large-cnn")
+        words = text.split()
+    
+        # Process long text in chunks if needed
+        if len(words) > max_words:
+            summaries = []
+            started = time.monotonic()
+            for i in range(0, len(words), max_words):
+                chunk = " ".join(words[i:i + max_words])
+                if time_budget is not None and time.monotonic() - started > time_budget:
+                    summaries.append(extractive_summary(chunk))
+                    continue
+                scheduler.apply()
+                chunk_summary = summarizer(chunk, max_length=150, min_length=30, do_sample=False)
+                summaries.append(chunk_summary[0]['summary_text'])
+            return " ".join(summaries)
+        else:
+            summary = summarizer(text, max_length=150, min_length=30, do_sample=False)
+            return summary[0]['summary_text']
+
+def save_output(transcript, summary, filename="transcript_summary.txt", metrics=None):
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write("TRANSCRIPT:\n\n" + transcript + "\n\nSUMMARY:\n\n" + summary)
+    print(f"[*] Transcript and summary saved to: {filename}")
+    if metrics:
+        # Run metrics (CPU allocation per stage) go next to the transcript
+        metrics_file = os.path.splitext(filename)[0] + "_metrics.json"
+        with open(metrics_file, "w", encoding="utf-8") as f:
+            json.dump(metrics, f, indent=2)
+        print(f"[*] CPU threads per stage: {describe_peaks(metrics)} (details in {metrics_file})")
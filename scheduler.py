@@ -0,0 +1,372 @@
+import os
+import json
+import time
+import socket
+import getpass
+import tempfile
+import threading
+import itertools
+from collections import deque
+from contextlib import contextmanager
+
+from file_locks import acquire_lock, atomic_replace, release_lock, pid_alive
+
+def _user_tag():
+    try:
+        return getpass.getuser()
+    except (KeyError, OSError):
+        return str(os.getuid()) if hasattr(os, "getuid") else "default"
+
+# Every process of this user on the host registers its running stages in one
+# table under SCHEDULER_DIR, so separate jobs share a single core budget
+# instead of each claiming the whole machine. The directory is per user so one
+# user's umask never locks the others out.
+SCHEDULER_DIR = os.environ.get(
+    "CPU_SCHEDULER_DIR", os.path.join(tempfile.gettempdir(), f"ai-es-cpp-scheduler-{_user_tag()}")
+)
+STAGE_STALE_AFTER = 30
+
+# Stage ids stay unique within a process even if the scheduler is replaced
+_stage_ids = itertools.count(1)
+
+def available_cores():
+    """Cores this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def physical_cores(cores=None, sysfs="/sys/devices/system/cpu"):
+    """One logical CPU per physical core, so SMT siblings don't count twice.
+
+    Uses the Linux CPU topology; elsewhere every available core is returned
+    (and the torch default thread count still caps what a process gets).
+    """
+    cores = available_cores() if cores is None else cores
+    seen = set()
+    result = []
+    for cpu in cores:
+        try:
+            with open(os.path.join(sysfs, f"cpu{cpu}", "topology", "thread_siblings_list")) as f:
+                siblings = f.read().strip()
+        except OSError:
+            return list(cores)
+        if siblings not in seen:
+            seen.add(siblings)
+            result.append(cpu)
+    return result
+
+def set_process_affinity(cores):
+    """Pin every thread of this process to `cores`.
+
+    sched_setaffinity(0, ...) only moves the calling thread on Linux, so each
+    thread listed in /proc/self/task is moved; threads started later inherit
+    the affinity of the thread that starts them.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return
+    try:
+        threads = [int(tid) for tid in os.listdir("/proc/self/task")]
+    except OSError:
+        threads = [0]
+    for tid in threads:
+        try:
+            os.sched_setaffinity(tid, cores)
+        except ProcessLookupError:
+            pass  # Thread exited meanwhile
+
+def configure_worker(num_threads=None, cores=None):
+    """Set torch thread pools (and optionally CPU affinity) for a fresh worker process.
+
+    Must run before the worker does any torch work: interop threads can only
+    be set once per process.
+    """
+    import torch
+
+    if cores:
+        set_process_affinity(cores)
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Already set in this process
+
+def split_threads(total, weights, min_threads=None):
+    """Split `total` threads proportionally to `weights` (largest remainder)"""
+    if not weights:
+        return []
+    min_threads = min_threads or [1] * len(weights)
+    weight_sum = sum(weights)
+    shares = [total * weight / weight_sum for weight in weights]
+    threads = [max(minimum, int(share)) for share, minimum in zip(shares, min_threads)]
+
+    # Hand leftover cores to the stages that lost the most to rounding
+    leftover = total - sum(threads)
+    by_remainder = sorted(range(len(weights)), key=lambda i: shares[i] - int(shares[i]), reverse=True)
+    for i in by_remainder[:max(0, leftover)]:
+        threads[i] += 1
+    return threads
+
+def allocate(stages, cores):
+    """Split `cores` between stages by weight; oldest stages get the first cores"""
+    stages = sorted(stages, key=lambda stage: (stage["started"], stage["id"]))
+    threads = split_threads(
+        len(cores),
+        [stage["weight"] for stage in stages],
+        [stage["min_threads"] for stage in stages],
+    )
+    allocation = {}
+    offset = 0
+    for stage, count in zip(stages, threads):
+        allocation[stage["id"]] = {
+            "name": stage["name"],
+            "pid": stage["pid"],
+            "ppid": stage.get("ppid"),
+            "threads": count,
+            # Wrap around when minimums oversubscribe the machine
+            "cores": [cores[(offset + i) % len(cores)] for i in range(count)],
+        }
+        offset += count
+    return allocation
+
+def prune_stale(stages, now, stale_after=STAGE_STALE_AFTER, host=None):
+    """Drop stages whose process stopped heartbeating or has exited"""
+    host = host or socket.gethostname()
+    live = []
+    for stage in stages:
+        if now - stage["heartbeat"] > stale_after:
+            continue
+        if stage["host"] == host and not pid_alive(stage["pid"]):
+            continue
+        live.append(stage)
+    return live
+
+def describe_allocation(allocation):
+    """One-line summary of an allocation"""
+    return ", ".join(f"{entry['name']}={entry['threads']}" for entry in allocation.values()) or "idle"
+
+class CpuScheduler:
+    """Owns the host's core budget and splits it between running model stages.
+
+    Every stage (Whisper transcription, BART summarization, a shard worker,
+    ...) registers in the host-wide table while it runs, whichever process it
+    is in. On each start and finish, and on a short poll while stages are
+    active, the cores are re-split by weight. torch thread counts are set per
+    calling thread, so the new share is only recorded here; the thread doing
+    the inference takes it up by calling `apply()` between units of work.
+    """
+
+    def __init__(self, total_cores=None, pin_cores=False, verbose=True, cores=None,
+                 state_dir=None, poll_interval=1.0):
+        cores = physical_cores() if cores is None else list(cores)
+        self.cores = cores[:total_cores] if total_cores else cores
+        self.total_cores = total_cores
+        self.pin_cores = pin_cores
+        self.verbose = verbose
+        self.state_dir = state_dir or SCHEDULER_DIR
+        self.table_path = os.path.join(self.state_dir, "stages.json")
+        self.poll_interval = poll_interval
+        self.lock = threading.RLock()
+        self.local = {}
+        self.allocation = {}
+        self.events = deque(maxlen=500)
+        self.max_threads = None
+        self._seq = 0
+        self._local_only = False
+        self._poller = None
+        self._wake = threading.Event()
+
+    def config(self):
+        """Settings for rebuilding this scheduler in a worker process"""
+        return {"total_cores": self.total_cores, "pin_cores": self.pin_cores, "verbose": self.verbose}
+
+    @contextmanager
+    def _table(self):
+        """Read-modify-write the host table under its lock file"""
+        os.makedirs(self.state_dir, exist_ok=True)
+        lock_path = f"{self.table_path}.lock"
+        while not acquire_lock(lock_path, stale_after=10):
+            time.sleep(0.01)
+        try:
+            try:
+                with open(self.table_path, encoding="utf-8") as f:
+                    table = json.load(f)
+            except (FileNotFoundError, ValueError):
+                table = {"stages": {}}
+            yield table
+            with atomic_replace(self.table_path) as temp_path:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(table, f)
+        finally:
+            release_lock(lock_path)
+
+    def _sync(self, event=None, name=None, removed=None):
+        """Publish this process's stages, then re-split the cores between every live stage"""
+        now = time.time()
+        for stage in self.local.values():
+            stage["heartbeat"] = now
+        try:
+            with self._table() as table:
+                stages = {s["id"]: s for s in prune_stale(table["stages"].values(), now)}
+                stages.pop(removed, None)
+                stages.update((stage["id"], dict(stage)) for stage in self.local.values())
+                table["stages"] = stages
+        except OSError as e:
+            # Without the shared table, split the cores between our own stages only
+            if not self._local_only:
+                print(f"[!] CPU scheduler table unavailable ({e}); sharing cores within this process only")
+                self._local_only = True
+            stages = {stage["id"]: dict(stage) for stage in self.local.values()}
+
+        allocation = allocate(list(stages.values()), self.cores)
+        changed = (
+            {k: v["threads"] for k, v in allocation.items()}
+            != {k: v["threads"] for k, v in self.allocation.items()}
+        )
+        self.allocation = allocation
+        if event or changed:
+            self._seq += 1
+            self.events.append({
+                "seq": self._seq,
+                "time": now,
+                "event": event or "rebalance",
+                "stage": name,
+                "allocation": {
+                    k: {
+                        "name": v["name"],
+                        "threads": v["threads"],
+                        # Ours, or a worker process we started (e.g. a shard worker)
+                        "own": k in self.local or v["ppid"] == os.getpid(),
+                    }
+                    for k, v in allocation.items()
+                },
+            })
+            if self.verbose and allocation:
+                print(f"[*] CPU allocation: {describe_allocation(allocation)}")
+
+    def apply(self):
+        """Give the calling thread (and, when pinning, this process) the share of our stages.
+
+        Call from the thread that runs torch, between units of work: thread
+        counts set from any other thread do not reach it.
+        """
+        with self.lock:
+            local = [self.allocation[stage_id] for stage_id in self.local if stage_id in self.allocation]
+        if not local:
+            return
+        # Imported here so the allocation helpers work without torch installed
+        import torch
+
+        if self.max_threads is None:
+            # torch's default is the physical core count; never go above it
+            self.max_threads = torch.get_num_threads()
+        threads = min(self.max_threads, sum(entry["threads"] for entry in local))
+        if torch.get_num_threads() != threads:
+            torch.set_num_threads(threads)
+        if self.pin_cores:
+            set_process_affinity({core for entry in local for core in entry["cores"]})
+
+    def _poll(self, wake):
+        """Follow stages started and finished by other processes; `apply()` picks up the result"""
+        while True:
+            wake.wait(self.poll_interval)
+            with self.lock:
+                if not self.local or self._poller is not threading.current_thread():
+                    return
+                wake.clear()
+                self._sync()
+
+    def register(self, name, weight=1.0, min_threads=1):
+        """Register a running stage; returns its id for `unregister`"""
+        with self.lock:
+            stage = {
+                "id": f"{socket.gethostname()}:{os.getpid()}:{next(_stage_ids)}",
+                "name": name,
+                "weight": weight,
+                "min_threads": min_threads,
+                "host": socket.gethostname(),
+                "pid": os.getpid(),
+                "ppid": os.getppid(),
+                "started": time.time(),
+                "heartbeat": time.time(),
+            }
+            self.local[stage["id"]] = stage
+            self._sync("start", name)
+            if self._poller is None or not self._poller.is_alive():
+                self._wake = threading.Event()
+                self._poller = threading.Thread(target=self._poll, args=(self._wake,), daemon=True)
+                self._poller.start()
+        self.apply()
+        return stage["id"]
+
+    def unregister(self, stage_id):
+        with self.lock:
+            stage = self.local.pop(stage_id, None)
+            if stage is None:
+                return
+            self._sync("finish", stage["name"], removed=stage_id)
+            if not self.local:
+                self._wake.set()
+        self.apply()
+
+    @contextmanager
+    def stage(self, name, weight=1.0, min_threads=1):
+        """Run a model stage under the scheduler"""
+        stage_id = self.register(name, weight, min_threads)
+        try:
+            yield stage_id
+        finally:
+            self.unregister(stage_id)
+
+    def observe(self):
+        """Refresh the host-wide allocation without registering a stage"""
+        with self.lock:
+            self._sync()
+
+    def mark(self):
+        """Position in the event log; pass to `metrics` to get one job's metrics"""
+        with self.lock:
+            return self._seq
+
+    def metrics(self, since=0):
+        """Allocation seen by this process since `mark()`, for run metrics.
+
+        Peaks cover only this job's stages (and its worker processes); the
+        events keep the whole host's allocation for context.
+        """
+        with self.lock:
+            events = [event for event in self.events if event["seq"] > since]
+            peak_threads = {}
+            for event in events:
+                for entry in event["allocation"].values():
+                    if entry["own"]:
+                        peak_threads[entry["name"]] = max(peak_threads.get(entry["name"], 0), entry["threads"])
+            return {
+                "total_cores": len(self.cores),
+                "pin_cores": self.pin_cores,
+                "active": {k: dict(v) for k, v in self.allocation.items()},
+                "peak_threads": peak_threads,
+                "events": events,
+            }
+
+def describe_peaks(metrics):
+    """One-line summary of a job's peak threads per stage"""
+    return ", ".join(f"{name}={threads}" for name, threads in metrics["peak_threads"].items()) or "none"
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    """Scheduler for this process; it shares the core budget with every other process on the host"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = CpuScheduler()
+        return _scheduler
+
+def configure_scheduler(total_cores=None, pin_cores=False, verbose=True):
+    """Replace this process's scheduler, e.g. to pin stages to cores"""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = CpuScheduler(total_cores, pin_cores, verbose)
+        return _scheduler
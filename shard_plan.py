@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+def plan_shards(total_duration, shard_duration=300, overlap=5):
+    """Split a timeline into shards that reach `overlap` seconds into their neighbours.
+
+    Each shard also records the range it "owns" (split at the middle of each
+    overlap) so that stitching can drop the duplicated speech. A remainder no
+    longer than `overlap` is folded into the last shard, which already reaches
+    over it.
+    """
+    if overlap >= shard_duration:
+        raise ValueError("overlap must be smaller than shard_duration")
+
+    shards = []
+    start = 0.0
+    index = 0
+    while start < total_duration:
+        end = min(start + shard_duration, total_duration)
+        if total_duration - end <= overlap:
+            end = total_duration
+        shards.append({
+            "index": index,
+            "start": max(0.0, start - overlap),
+            "end": min(total_duration, end + overlap),
+            "own_start": start,
+            "own_end": end,
+        })
+        start = end
+        index += 1
+    return shards
+
+def _repeats(segment, previous, window):
+    """Whether `segment` is `previous` heard again, starting within `window` seconds of its end"""
+    return (
+        previous is not None
+        and segment["text"] == previous["text"]
+        and segment["start"] <= previous["end"] + window
+    )
+
+def stitch_shards(shards, results):
+    """Join shard results in timeline order, keeping each segment only in the shard that owns it"""
+    by_index = {result["index"]: result for result in results}
+    transcript = ""
+    previous = None  # Last segment kept, possibly from an earlier shard
+    for shard in shards:
+        result = by_index.get(shard["index"])
+        if result is None:
+            print(f"[!] Missing result for shard {shard['index']}")
+            continue
+
+        overlap = shard["own_start"] - shard["start"]
+        kept = []
+        for segment in result["segments"]:
+            midpoint = (segment["start"] + segment["end"]) / 2
+            if not shard["own_start"] <= midpoint < shard["own_end"]:
+                continue
+            if kept:
+                # Whisper may still repeat a sentence with overlapping timings
+                if _repeats(segment, previous, 0):
+                    continue
+            elif segment["start"] - shard["own_start"] <= overlap and _repeats(segment, previous, overlap):
+                # The previous shard's last sentence, heard again across the boundary
+                continue
+            kept.append(segment["text"])
+            previous = segment
+
+        if kept:
+            timestamp = str(timedelta(seconds=int(shard["own_start"])))
+            transcript += f"[{timestamp}] {' '.join(kept)}\n"
+    return transcript
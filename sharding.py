@@ -0,0 +1,261 @@
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+import argparse
+import multiprocessing.util
+from concurrent.futures import ProcessPoolExecutor
+
+from meeting import get_video_duration, extract_audio_chunk, summarize_text, save_output
+from scheduler import configure_scheduler, configure_worker, get_scheduler
+from weight_store import load_whisper_model
+from shard_plan import plan_shards, stitch_shards
+from file_locks import acquire_lock, atomic_replace, lock_is_stale, release_lock, LockHeartbeat
+
+INITIAL_PROMPT = "This is a meeting transcript. Please maintain proper punctuation and capitalization."
+
+# Model loaded once per worker process by _init_worker
+_worker_model = None
+
+def _init_worker(model_name, scheduler_config=None):
+    """Give each worker its own Whisper model and a stage in the host-wide CPU budget"""
+    global _worker_model
+    scheduler = configure_scheduler(**scheduler_config) if scheduler_config else get_scheduler()
+    configure_worker()
+    # The stage lives as long as the worker; the scheduler sets its threads
+    stage_id = scheduler.register("whisper-shard")
+    multiprocessing.util.Finalize(None, scheduler.unregister, args=(stage_id,), exitpriority=10)
+    # Weights are mapped from the shared store, so N workers hold one copy
+    _worker_model = load_whisper_model(model_name, device="cpu").float()
+
+def transcribe_shard(video_path, shard, model=None):
+    """Transcribe one shard, returning segments with absolute timestamps"""
+    model = model or _worker_model
+    # Threads follow the current host allocation from one shard to the next
+    get_scheduler().apply()
+    temp_audio = os.path.join(
+        tempfile.gettempdir(),
+        f"temp_shard_{socket.gethostname()}_{os.getpid()}_{shard['index']}.wav",
+    )
+    segments = []
+    try:
+        if not extract_audio_chunk(video_path, shard["start"], shard["end"] - shard["start"], temp_audio):
+            raise RuntimeError(f"Could not extract audio for shard {shard['index']} of {video_path}")
+        result = model.transcribe(temp_audio, initial_prompt=INITIAL_PROMPT, fp16=False)
+        for segment in result["segments"]:
+            segments.append({
+                "start": shard["start"] + segment["start"],
+                "end": shard["start"] + segment["end"],
+                "text": segment["text"].strip(),
+            })
+    finally:
+        if os.path.exists(temp_audio):
+            os.remove(temp_audio)
+    return {"index": shard["index"], "segments": segments}
+
+def default_workers():
+    """Number of worker processes to use when none is given"""
+    return max(1, min(4, (os.cpu_count() or 1) // 2))
+
+def process_video_sharded(video_path, shard_duration=300, overlap=5, workers=None, model_name="base",
+                          summary_mode="best", summary_time_budget=None):
+    """Transcribe one recording by running its shards in a process pool"""
+    print("[*] Starting sharded video processing...")
+
+    if not os.path.exists(video_path):
+        print(f"[!] File not found: {video_path}")
+        return None, None
+
+    total_duration = get_video_duration(video_path)
+    print(f"[*] Total video duration: {total_duration:.2f} seconds")
+
+    shards = plan_shards(total_duration, shard_duration, overlap)
+    workers = min(workers or default_workers(), len(shards))
+
+    print(f"[*] {len(shards)} shards across {workers} workers")
+
+    scheduler = get_scheduler()
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(model_name, scheduler.config()),
+    ) as executor:
+        futures = [executor.submit(transcribe_shard, video_path, shard) for shard in shards]
+        try:
+            for done, future in enumerate(futures, start=1):
+                results.append(future.result())
+                # Record the workers' allocation in this process's run metrics
+                scheduler.observe()
+                print(f"[*] Progress: {done / len(shards) * 100:.1f}%")
+        except BaseException:
+            # Fail now rather than after every queued shard has been transcribed
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    full_transcript = stitch_shards(shards, results)
+
+    print("\n[*] Generating summary...")
+    summary = summarize_text(full_transcript, mode=summary_mode, time_budget=summary_time_budget)
+
+    return full_transcript, summary
+
+# --- Multi-host coordination over a shared directory -----------------------
+#
+# Layout of the shared directory:
+#   plan.json             video path and shard list, written by the coordinator
+#   shard_0000.lock       claim by one worker, with holder and heartbeat (see file_locks.py)
+#   shard_0000.json       result written by that worker once it is done
+#
+# A claim whose heartbeat stops for LOCK_STALE_AFTER seconds (host killed,
+# out of memory) is reclaimed by the next worker that looks at it.
+
+LOCK_STALE_AFTER = 120
+LOCK_HEARTBEAT = 15
+
+def _shard_file(shared_dir, index, suffix):
+    return os.path.join(shared_dir, f"shard_{index:04d}.{suffix}")
+
+def _write_json(path, data):
+    """Write JSON via a rename so readers never see a partial file"""
+    with atomic_replace(path) as temp_path:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+def _read_plan(shared_dir):
+    with open(os.path.join(shared_dir, "plan.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+def _pending_shards(shared_dir, shards):
+    return [s for s in shards if not os.path.exists(_shard_file(shared_dir, s["index"], "json"))]
+
+def write_shard_plan(video_path, shared_dir, shard_duration=300, overlap=5):
+    """Plan the shards of a recording into a directory shared by all hosts"""
+    os.makedirs(shared_dir, exist_ok=True)
+    shards = plan_shards(get_video_duration(video_path), shard_duration, overlap)
+    _write_json(os.path.join(shared_dir, "plan.json"), {
+        "video_path": os.path.abspath(video_path),
+        "shards": shards,
+    })
+    print(f"[*] Planned {len(shards)} shards in {shared_dir}")
+    return shards
+
+def run_shard_worker(shared_dir, model_name="base", poll_interval=5):
+    """Claim and transcribe shards from a shared plan until every shard has a result.
+
+    Shards claimed by other live workers are skipped; the worker keeps
+    polling them so it can take over any claim that goes stale.
+    """
+    plan = _read_plan(shared_dir)
+
+    _init_worker(model_name)
+    done = 0
+    while True:
+        pending = _pending_shards(shared_dir, plan["shards"])
+        if not pending:
+            break
+
+        claimed = False
+        for shard in pending:
+            lock_path = _shard_file(shared_dir, shard["index"], "lock")
+            if not acquire_lock(lock_path, LOCK_STALE_AFTER):
+                continue
+            claimed = True
+            try:
+                # Another worker may have finished it between our check and claim
+                if os.path.exists(_shard_file(shared_dir, shard["index"], "json")):
+                    continue
+                print(f"[*] Transcribing shard {shard['index']}: {shard['start']:.1f}s to {shard['end']:.1f}s")
+                with LockHeartbeat(lock_path, LOCK_HEARTBEAT):
+                    result = transcribe_shard(plan["video_path"], shard)
+                _write_json(_shard_file(shared_dir, shard["index"], "json"), result)
+                done += 1
+            finally:
+                # On failure this lets another worker retry the shard
+                release_lock(lock_path)
+
+        if not claimed:
+            print(f"[*] {len(pending)} shards claimed by other workers, waiting...")
+            time.sleep(poll_interval)
+    print(f"[✓] Worker finished {done} shards.")
+    return done
+
+def collect_shards(shared_dir, poll_interval=5, timeout=None):
+    """Wait for every shard result in the shared directory and stitch them"""
+    shards = _read_plan(shared_dir)["shards"]
+    started = time.monotonic()
+    while True:
+        pending = _pending_shards(shared_dir, shards)
+        if not pending:
+            break
+        if timeout is not None and time.monotonic() - started > timeout:
+            raise TimeoutError(f"{len(pending)} shards still pending in {shared_dir}")
+        stale = [
+            s["index"] for s in pending
+            if lock_is_stale(_shard_file(shared_dir, s["index"], "lock"), LOCK_STALE_AFTER)
+        ]
+        if stale:
+            print(f"[!] Shards {stale} have stale claims; start a worker to take them over")
+        print(f"[*] Waiting for {len(pending)}/{len(shards)} shards...")
+        time.sleep(poll_interval)
+
+    results = []
+    for shard in shards:
+        with open(_shard_file(shared_dir, shard["index"], "json"), encoding="utf-8") as f:
+            results.append(json.load(f))
+    return stitch_shards(shards, results)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transcribe one long recording in parallel shards")
+    parser.add_argument("--model", default="base", help="Whisper model name")
+    parser.add_argument("--shard-duration", type=float, default=300, help="Shard length in seconds")
+    parser.add_argument("--overlap", type=float, default=5, help="Overlap between shards in seconds")
+    parser.add_argument("--cores", type=int, default=None, help="Number of cores this host may use")
+    parser.add_argument("--pin-cores", action="store_true", help="Pin each stage and worker to its own cores")
+    parser.add_argument("--summary-mode", choices=["fast", "balanced", "best"], default="best",
+                        help="Extractive only, extractive pre-filter + BART, or BART only")
+    parser.add_argument("--summary-time-budget", type=float, default=None,
+                        help="Seconds of BART time before falling back to extractive summaries")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    local = commands.add_parser("local", help="Run all shards in a local process pool")
+    local.add_argument("video_path")
+    local.add_argument("--workers", type=int, default=None)
+
+    plan = commands.add_parser("plan", help="Write a shard plan to a shared directory")
+    plan.add_argument("video_path")
+    plan.add_argument("shared_dir")
+
+    work = commands.add_parser("work", help="Transcribe shards from a shared directory")
+    work.add_argument("shared_dir")
+
+    collect = commands.add_parser("collect", help="Stitch shard results and summarize")
+    collect.add_argument("shared_dir")
+    collect.add_argument("--timeout", type=float, default=None,
+                         help="Give up after this many seconds of waiting for shards")
+
+    args = parser.parse_args(argv)
+    scheduler = configure_scheduler(args.cores, args.pin_cores)
+    mark = scheduler.mark()
+
+    if args.command == "local":
+        transcript, summary = process_video_sharded(
+            args.video_path, args.shard_duration, args.overlap, args.workers, args.model,
+            args.summary_mode, args.summary_time_budget
+        )
+        if transcript and summary:
+            save_output(transcript, summary, metrics=scheduler.metrics(since=mark))
+    elif args.command == "plan":
+        write_shard_plan(args.video_path, args.shared_dir, args.shard_duration, args.overlap)
+    elif args.command == "work":
+        run_shard_worker(args.shared_dir, args.model)
+    elif args.command == "collect":
+        transcript = collect_shards(args.shared_dir, timeout=args.timeout)
+        print("\n[*] Generating summary...")
+        summary = summarize_text(transcript, mode=args.summary_mode, time_budget=args.summary_time_budget)
+        save_output(transcript, summary, metrics=scheduler.metrics(since=mark))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
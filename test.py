@@ -1,11 +1,12 @@
 import os
 import sys
-import ffmpeg
-import whisper
 import torch
-from transformers import pipeline
 import numpy as np
 from datetime import timedelta
+from meeting import get_video_duration, extract_audio_chunk, summarize_text, save_output
+from scheduler import get_scheduler
+from sharding import process_video_sharded
+from weight_store import load_whisper_model
 
 # Ensure output encoding is UTF-8 (fix for Windows emoji/Unicode errors)
 try:
@@ -13,28 +14,6 @@ try:
 except:
     pass  # For Python <3.7
 
-def get_video_duration(video_path):
-    """Get the duration of the video using ffmpeg"""
-    probe = ffmpeg.probe(video_path)
-    duration = float(probe['streams'][0]['duration'])
-    return duration
-
-def extract_audio_chunk(video_path, start_time, chunk_duration, output_audio):
-    """Extract a chunk of audio from the video"""
-    print(f"[*] Extracting audio chunk from {start_time}s to {start_time + chunk_duration}s...")
-    try:
-        (
-            ffmpeg
-            .input(video_path, ss=start_time, t=chunk_duration)
-            .output(output_audio, acodec='pcm_s16le', ac=1, ar=16000)
-            .overwrite_output()
-            .run(capture_stdout=True, capture_stderr=True)
-        )
-        return True
-    except ffmpeg.Error as e:
-        print(f"Error extracting audio chunk: {e.stderr.decode()}")
-        return False
-
 def transcribe_chunk(model, audio_path, start_time):
     """Transcribe a single audio chunk"""
     result = model.transcribe(
@@ -45,7 +24,7 @@ def transcribe_chunk(model, audio_path, start_time):
     timestamp = str(timedelta(seconds=int(start_time)))
     return f"[{timestamp}] {result['text']}\n"
 
-def process_video_in_chunks(video_path, chunk_duration=300):  # 5 minutes chunks
+def process_video_in_chunks(video_path, chunk_duration=300, summary_mode="best", summary_time_budget=None):  # 5 minutes chunks
     print("[*] Starting video processing...")
     
     if not os.path.exists(video_path):
@@ -56,14 +35,9 @@ def process_video_in_chunks(video_path, chunk_duration=300):  # 5 minutes chunks
     total_duration = get_video_duration(video_path)
     print(f"[*] Total video duration: {total_duration:.2f} seconds")
     
-    # Load Whisper model with explicit CPU and FP32 settings
+    # Load Whisper model with explicit CPU and FP32 settings, mapped from the shared weight store
     print("[*] Loading Whisper model...")
-    model = whisper.load_model(
-        "base",
-        device="cpu",
-        download_root=None,
-        in_memory=True
-    )
+    model = load_whisper_model("base", device="cpu")
     # Force FP32
     model = model.float()
     
@@ -71,58 +45,49 @@ def process_video_in_chunks(video_path, chunk_duration=300):  # 5 minutes chunks
     full_transcript = ""
     temp_audio = "temp_chunk.wav"
     
-    # Process video in chunks
-    start_time = 0
-    while start_time < total_duration:
-        current_chunk_duration = min(chunk_duration, total_duration - start_time)
+    # Process video in chunks, with the cores the scheduler gives transcription
+    scheduler = get_scheduler()
+    with scheduler.stage("whisper"):
+        start_time = 0
+        while start_time < total_duration:
+            # Take up any rebalance since the last chunk
+            scheduler.apply()
+            current_chunk_duration = min(chunk_duration, total_duration - start_time)
         
-        print(f"\n[*] Processing chunk: {start_time:.1f}s to {start_time + current_chunk_duration:.1f}s")
+            print(f"\n[*] Processing chunk: {start_time:.1f}s to {start_time + current_chunk_duration:.1f}s")
         
-        # Extract audio chunk
-        if extract_audio_chunk(video_path, start_time, current_chunk_duration, temp_audio):
-            # Transcribe chunk
-            chunk_transcript = transcribe_chunk(model, temp_audio, start_time)
-            full_transcript += chunk_transcript
+            # Extract audio chunk
+            if extract_audio_chunk(video_path, start_time, current_chunk_duration, temp_audio):
+                # Transcribe chunk
+                chunk_transcript = transcribe_chunk(model, temp_audio, start_time)
+                full_transcript += chunk_transcript
             
-            # Clean up temp file
-            if os.path.exists(temp_audio):
-                os.remove(temp_audio)
+                # Clean up temp file
+                if os.path.exists(temp_audio):
+                    os.remove(temp_audio)
         
-        start_time += chunk_duration
-        print(f"[*] Progress: {min(100, (start_time/total_duration)*100):.1f}%")
+            start_time += chunk_duration
+            print(f"[*] Progress: {min(100, (start_time/total_duration)*100):.1f}%")
     
     # Summarize the full transcript
     print("\n[*] Generating summary...")
-    summary = summarize_text(full_transcript)
+    summary = summarize_text(full_transcript, mode=summary_mode, time_budget=summary_time_budget)
     
     return full_transcript, summary
 
-def summarize_text(text, max_words=800):
-    print("[*] Summarizing transcript with Transformers...")
-    summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-    words = text.split()
-    
-    # Process long text in chunks if needed
-    if len(words) > max_words:
-        summaries = []
-        for i in range(0, len(words), max_words):
-            chunk = " ".join(words[i:i + max_words])
-            chunk_summary = summarizer(chunk, max_length=150, min_length=30, do_sample=False)
-            summaries.append(chunk_summary[0]['summary_text'])
-        return " ".join(summaries)
+def summarize_meeting(video_path, workers=None, summary_mode="best", summary_time_budget=None):
+    scheduler = get_scheduler()
+    mark = scheduler.mark()
+    if workers:
+        transcript, summary = process_video_sharded(
+            video_path, workers=workers, summary_mode=summary_mode, summary_time_budget=summary_time_budget
+        )
     else:
-        summary = summarizer(text, max_length=150, min_length=30, do_sample=False)
-        return summary[0]['summary_text']
-
-def save_output(transcript, summary, filename="transcript_summary.txt"):
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write("TRANSCRIPT:\n\n" + transcript + "\n\nSUMMARY:\n\n" + summary)
-    print(f"[*] Transcript and summary saved to: {filename}")
-
-def summarize_meeting(video_path):
-    transcript, summary = process_video_in_chunks(video_path)
+        transcript, summary = process_video_in_chunks(
+            video_path, summary_mode=summary_mode, summary_time_budget=summary_time_budget
+        )
     if transcript and summary:
-        save_output(transcript, summary)
+        save_output(transcript, summary, metrics=scheduler.metrics(since=mark))
         print("[✓] Done.")
     else:
         print("[!] Processing failed.")
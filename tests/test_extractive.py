@@ -0,0 +1,61 @@
+from extractive import extractive_summary, prefilter_text, rank_sentences, select_sentences, split_sentences
+
+TRANSCRIPT = (
+    "[0:00:00] The budget for the project was approved by finance today. "
+    "We talked about lunch plans for a while. "
+    "The project budget covers hiring two engineers next quarter. "
+    "Hiring engineers is the main risk for the project timeline. Okay.\n"
+    "[0:05:00] Next the timeline for the project release was moved to March. "
+    "Someone asked about the parking lot."
+)
+
+
+def test_split_sentences_drops_timestamps_and_fragments():
+    sentences = split_sentences(TRANSCRIPT)
+
+    assert len(sentences) == 6
+    assert all("[" not in sentence for sentence in sentences)
+    assert "Okay." not in sentences
+
+
+def test_summary_prefers_central_sentences_in_transcript_order():
+    summary = extractive_summary(TRANSCRIPT, max_words=30)
+
+    assert "project budget covers hiring" in summary
+    assert "lunch" not in summary
+    assert summary.index("budget covers") < summary.index("release was moved")
+
+
+def test_tfidf_method_ranks_every_sentence():
+    sentences = split_sentences(TRANSCRIPT)
+
+    assert sorted(rank_sentences(sentences, method="tfidf")) == list(range(len(sentences)))
+
+
+def test_long_sentence_is_windowed_not_dropped():
+    sentence = " ".join(f"word{i}" for i in range(200)) + "."
+
+    summary = extractive_summary(sentence, max_words=150)
+
+    assert summary
+    assert len(summary.split()) <= 150
+
+
+def test_unpunctuated_text_prefilters_to_budget():
+    text = " ".join(f"topic{i % 50}" for i in range(3200))
+
+    filtered = prefilter_text(text, 2400)
+
+    assert filtered
+    assert len(filtered.split()) <= 2400
+
+
+def test_select_never_empty_for_nonempty_input():
+    assert select_sentences(["one two three four five"], max_words=2) == ["one two"]
+    assert select_sentences(["one two three four five"], max_words=0) == ["one"]
+
+
+def test_short_or_empty_input_passes_through():
+    assert extractive_summary("Thanks all.") == "Thanks all."
+    assert extractive_summary("") == ""
+    assert prefilter_text("short text", 2400) == "short text"
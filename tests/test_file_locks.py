@@ -0,0 +1,75 @@
+import json
+import os
+import socket
+import time
+
+import pytest
+
+from file_locks import acquire_lock, atomic_replace, lock_is_stale, read_lock, refresh_lock, release_lock
+
+
+def write_foreign_lock(path, heartbeat, host="other-host", pid=1):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"holder": f"{host}:{pid}", "host": host, "pid": pid, "heartbeat": heartbeat}, f)
+
+
+def test_lock_is_exclusive_until_released(tmp_path):
+    path = str(tmp_path / "shard_0000.lock")
+
+    assert acquire_lock(path)
+    assert read_lock(path)["pid"] == os.getpid()
+    assert refresh_lock(path)
+
+    release_lock(path)
+    assert not os.path.exists(path)
+    assert acquire_lock(path)
+
+
+def test_live_foreign_lock_is_respected(tmp_path):
+    path = str(tmp_path / "shard_0000.lock")
+    write_foreign_lock(path, heartbeat=time.time())
+
+    assert not acquire_lock(path, stale_after=60)
+    assert not refresh_lock(path)
+    release_lock(path)
+    assert os.path.exists(path)
+
+
+def test_stale_heartbeat_is_reclaimed(tmp_path):
+    path = str(tmp_path / "shard_0000.lock")
+    write_foreign_lock(path, heartbeat=time.time() - 600)
+
+    assert lock_is_stale(path, stale_after=60)
+    assert acquire_lock(path, stale_after=60)
+    assert read_lock(path)["pid"] == os.getpid()
+
+
+def test_dead_owner_on_this_host_is_stale(tmp_path):
+    path = str(tmp_path / "weights.safetensors.lock")
+    # PIDs above the kernel's pid_max never exist
+    write_foreign_lock(path, heartbeat=time.time(), host=socket.gethostname(), pid=2 ** 30)
+
+    if os.name != "nt":
+        assert lock_is_stale(path, stale_after=60)
+
+
+def test_missing_lock_is_not_stale(tmp_path):
+    assert not lock_is_stale(str(tmp_path / "nothing.lock"), stale_after=0)
+
+
+def test_atomic_replace_keeps_old_file_on_failure(tmp_path):
+    path = tmp_path / "plan.json"
+    path.write_text("old")
+
+    with pytest.raises(RuntimeError):
+        with atomic_replace(str(path)) as temp_path:
+            with open(temp_path, "w") as f:
+                f.write("half")
+            raise RuntimeError("interrupted")
+    assert path.read_text() == "old"
+
+    with atomic_replace(str(path)) as temp_path:
+        with open(temp_path, "w") as f:
+            f.write("new")
+    assert path.read_text() == "new"
+    assert [p.name for p in tmp_path.iterdir()] == ["plan.json"]
@@ -0,0 +1,163 @@
+import os
+import socket
+import time
+
+import pytest
+
+import scheduler
+from scheduler import CpuScheduler, allocate, describe_peaks, physical_cores, prune_stale, split_threads
+
+
+@pytest.fixture(autouse=True)
+def no_torch(monkeypatch):
+    # Thread counts are checked through the allocation; torch itself is not needed
+    monkeypatch.setattr(CpuScheduler, "apply", lambda self: None)
+
+
+def stage(stage_id, name="whisper", weight=1.0, min_threads=1, started=0.0, **extra):
+    entry = {
+        "id": stage_id, "name": name, "weight": weight, "min_threads": min_threads,
+        "started": started, "host": socket.gethostname(), "pid": os.getpid(), "heartbeat": time.time(),
+    }
+    entry.update(extra)
+    return entry
+
+
+def test_split_threads_is_proportional_and_uses_every_core():
+    assert split_threads(8, [1, 1, 1]) == [3, 3, 2]
+    assert split_threads(8, [3, 1]) == [6, 2]
+    assert split_threads(8, []) == []
+
+
+def test_split_threads_minimums_can_oversubscribe():
+    assert split_threads(2, [1, 1, 1]) == [1, 1, 1]
+    assert split_threads(4, [1, 1], [3, 3]) == [3, 3]
+
+
+def test_allocate_gives_disjoint_cores_oldest_first():
+    allocation = allocate([stage("b", started=2.0), stage("a", started=1.0, weight=3)], [0, 1, 2, 3])
+
+    assert allocation["a"]["threads"] == 3
+    assert allocation["a"]["cores"] == [0, 1, 2]
+    assert allocation["b"]["cores"] == [3]
+
+
+def test_allocate_wraps_cores_when_oversubscribed():
+    allocation = allocate([stage("a", started=1), stage("b", started=2), stage("c", started=3)], [0, 1])
+
+    assert [allocation[s]["cores"] for s in "abc"] == [[0], [1], [0]]
+
+
+def test_prune_stale_drops_old_heartbeats_and_dead_pids():
+    now = time.time()
+    stages = [
+        stage("live"),
+        stage("old", heartbeat=now - 120),
+        stage("dead", pid=2 ** 30),
+        stage("remote", host="other-host", pid=2 ** 30),
+    ]
+
+    kept = [s["id"] for s in prune_stale(stages, now, stale_after=30)]
+
+    expected = ["live", "remote"] if os.name != "nt" else ["live", "dead", "remote"]
+    assert kept == expected
+
+
+def test_physical_cores_collapses_smt_siblings(tmp_path):
+    for cpu, siblings in {0: "0,2", 1: "1,3", 2: "0,2", 3: "1,3"}.items():
+        topology = tmp_path / f"cpu{cpu}" / "topology"
+        topology.mkdir(parents=True)
+        (topology / "thread_siblings_list").write_text(siblings + "\n")
+
+    assert physical_cores([0, 1, 2, 3], sysfs=str(tmp_path)) == [0, 1]
+
+
+def test_physical_cores_falls_back_without_topology(tmp_path):
+    assert physical_cores([0, 1, 2], sysfs=str(tmp_path)) == [0, 1, 2]
+
+
+def test_stages_in_separate_schedulers_share_one_budget(tmp_path):
+    # Two schedulers on one state directory stand in for two jobs on one host
+    first = CpuScheduler(cores=range(8), state_dir=str(tmp_path), verbose=False, poll_interval=60)
+    second = CpuScheduler(cores=range(8), state_dir=str(tmp_path), verbose=False, poll_interval=60)
+
+    with first.stage("whisper") as whisper_id:
+        assert first.allocation[whisper_id]["threads"] == 8
+
+        with second.stage("summarizer") as summarizer_id:
+            assert second.allocation[whisper_id]["threads"] == 4
+            assert second.allocation[summarizer_id]["threads"] == 4
+
+            first.observe()
+            assert first.allocation[whisper_id]["threads"] == 4
+
+        first.observe()
+        assert first.allocation == {whisper_id: first.allocation[whisper_id]}
+        assert first.allocation[whisper_id]["threads"] == 8
+
+
+def test_metrics_are_per_job(tmp_path):
+    sched = CpuScheduler(cores=range(4), state_dir=str(tmp_path), verbose=False, poll_interval=60)
+
+    with sched.stage("whisper"):
+        pass
+    mark = sched.mark()
+    with sched.stage("summarizer"):
+        pass
+
+    metrics = sched.metrics(since=mark)
+    assert metrics["peak_threads"] == {"summarizer": 4}
+    assert describe_peaks(metrics) == "summarizer=4"
+    assert all(event["seq"] > mark for event in metrics["events"])
+
+
+def test_metrics_leave_out_other_jobs_stages(tmp_path):
+    first = CpuScheduler(cores=range(8), state_dir=str(tmp_path), verbose=False, poll_interval=60)
+    second = CpuScheduler(cores=range(8), state_dir=str(tmp_path), verbose=False, poll_interval=60)
+    first_mark, second_mark = first.mark(), second.mark()
+
+    with first.stage("whisper"):
+        with second.stage("summarizer"):
+            first.observe()
+
+    assert first.metrics(since=first_mark)["peak_threads"] == {"whisper": 8}
+    assert second.metrics(since=second_mark)["peak_threads"] == {"summarizer": 4}
+
+
+def test_metrics_count_our_worker_processes(tmp_path):
+    sched = CpuScheduler(cores=range(4), state_dir=str(tmp_path), verbose=False, poll_interval=60)
+    with sched._table() as table:
+        # A live process we started, e.g. a shard worker
+        table["stages"]["worker"] = stage("worker", name="whisper-shard", pid=os.getppid(), ppid=os.getpid())
+        table["stages"]["other"] = stage("other", name="summarizer", pid=os.getppid(), ppid=None)
+
+    mark = sched.mark()
+    sched.observe()
+
+    assert sched.metrics(since=mark)["peak_threads"] == {"whisper-shard": 2}
+
+
+def test_unwritable_table_falls_back_to_local_allocation(tmp_path):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    sched = CpuScheduler(cores=range(4), state_dir=str(blocker / "state"), verbose=False, poll_interval=60)
+
+    with sched.stage("whisper") as whisper_id:
+        assert sched.allocation[whisper_id]["threads"] == 4
+
+
+def test_default_table_is_per_user():
+    if "CPU_SCHEDULER_DIR" in os.environ:
+        pytest.skip("table directory overridden")
+    assert os.path.basename(scheduler.SCHEDULER_DIR).endswith(scheduler._user_tag())
+
+
+def test_event_log_is_bounded(tmp_path):
+    sched = CpuScheduler(cores=range(2), state_dir=str(tmp_path), verbose=False, poll_interval=60)
+
+    for _ in range(300):
+        with sched.stage("whisper"):
+            pass
+
+    assert len(sched.events) == sched.events.maxlen
+    assert scheduler.get_scheduler() is scheduler.get_scheduler()
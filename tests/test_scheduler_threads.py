@@ -0,0 +1,45 @@
+import threading
+
+import pytest
+
+from scheduler import CpuScheduler
+
+torch = pytest.importorskip("torch")
+
+
+def test_rebalance_from_another_scheduler_reaches_the_calling_thread(tmp_path):
+    cores = torch.get_num_threads()
+    if cores < 2:
+        pytest.skip("needs at least two torch threads")
+
+    ours = CpuScheduler(cores=range(cores), state_dir=str(tmp_path), verbose=False, poll_interval=0.05)
+    other = CpuScheduler(cores=range(cores), state_dir=str(tmp_path), verbose=False, poll_interval=60)
+    try:
+        with ours.stage("whisper") as whisper_id:
+            assert torch.get_num_threads() == cores
+
+            # Another job starts BART from a different thread
+            started = threading.Event()
+            finished = threading.Event()
+
+            def other_job():
+                with other.stage("summarizer"):
+                    started.set()
+                    finished.wait(10)
+
+            thread = threading.Thread(target=other_job)
+            thread.start()
+            started.wait(10)
+            try:
+                # Our poller sees it; the threads change once this thread applies it
+                for _ in range(100):
+                    if ours.allocation[whisper_id]["threads"] < cores:
+                        break
+                    threading.Event().wait(0.05)
+                ours.apply()
+                assert torch.get_num_threads() == ours.allocation[whisper_id]["threads"] < cores
+            finally:
+                finished.set()
+                thread.join()
+    finally:
+        torch.set_num_threads(cores)
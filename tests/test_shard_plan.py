@@ -0,0 +1,78 @@
+import pytest
+
+from shard_plan import plan_shards, stitch_shards
+
+
+def segment(start, end, text):
+    return {"start": start, "end": end, "text": text}
+
+
+def test_plan_covers_timeline_with_overlaps():
+    shards = plan_shards(900, shard_duration=300, overlap=5)
+
+    assert [(s["own_start"], s["own_end"]) for s in shards] == [(0, 300), (300, 600), (600, 900)]
+    assert [(s["start"], s["end"]) for s in shards] == [(0, 305), (295, 605), (595, 900)]
+    assert [s["index"] for s in shards] == [0, 1, 2]
+
+
+def test_tiny_trailing_remainder_folds_into_last_shard():
+    shards = plan_shards(603, shard_duration=300, overlap=5)
+
+    assert len(shards) == 2
+    assert shards[-1]["own_end"] == 603
+    assert shards[-1]["end"] == 603
+
+
+def test_short_recording_is_one_shard():
+    assert plan_shards(42, shard_duration=300, overlap=5) == [
+        {"index": 0, "start": 0.0, "end": 42, "own_start": 0.0, "own_end": 42}
+    ]
+
+
+def test_overlap_must_be_smaller_than_shard():
+    with pytest.raises(ValueError):
+        plan_shards(900, shard_duration=10, overlap=10)
+
+
+def test_stitch_keeps_overlap_speech_once():
+    shards = plan_shards(20, shard_duration=10, overlap=2)
+    results = [
+        {"index": 0, "segments": [segment(0, 5, "Hello everyone."), segment(8, 11, "Budget is approved.")]},
+        # The same sentence heard again in the second shard's overlap
+        {"index": 1, "segments": [segment(8.2, 11.1, "Budget is approved."), segment(13, 18, "Next item.")]},
+    ]
+
+    transcript = stitch_shards(shards, results)
+
+    assert transcript.count("Budget is approved.") == 1
+    assert transcript == "[0:00:00] Hello everyone. Budget is approved.\n[0:00:10] Next item.\n"
+
+
+def test_stitch_drops_sentence_repeated_across_boundary():
+    shards = plan_shards(20, shard_duration=10, overlap=2)
+    results = [
+        {"index": 1, "segments": [segment(10, 12, "We agreed."), segment(13, 15, "Moving on.")]},
+        {"index": 0, "segments": [segment(7, 9.5, "We agreed.")]},
+    ]
+
+    assert stitch_shards(shards, results) == "[0:00:00] We agreed.\n[0:00:10] Moving on.\n"
+
+
+def test_stitch_skips_missing_and_empty_shards():
+    shards = plan_shards(30, shard_duration=10, overlap=2)
+    results = [
+        {"index": 0, "segments": []},
+        {"index": 2, "segments": [segment(22, 25, "Closing remarks.")]},
+    ]
+
+    assert stitch_shards(shards, results) == "[0:00:20] Closing remarks.\n"
+
+
+def test_stitch_keeps_same_words_spoken_again_later():
+    shards = plan_shards(20, shard_duration=10, overlap=2)
+    results = [
+        {"index": 0, "segments": [segment(1, 3, "Yes.")]},
+        {"index": 1, "segments": [segment(11, 12, "Yes."), segment(13, 15, "Next.")]},
+    ]
+
+    assert stitch_shards(shards, results) == "[0:00:00] Yes.\n[0:00:10] Yes. Next.\n"
@@ -0,0 +1,67 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("safetensors")
+pytest.importorskip("whisper")
+pytest.importorskip("transformers")
+
+from weight_store import _build_with_weights, _load_state_dict, _save_state_dict, _wait_or_convert
+
+
+class TiedModel(torch.nn.Module):
+    """Tied input/output embeddings plus non-persistent buffers, like Whisper and BART"""
+
+    def __init__(self):
+        super().__init__()
+        self.embed = torch.nn.Embedding(10, 4)
+        self.head = torch.nn.Linear(4, 10, bias=False)
+        self.head.weight = self.embed.weight
+        self.register_buffer("mask", torch.full((3, 3), -float("inf")).triu_(1), persistent=False)
+        heads = torch.zeros(2, 2, dtype=torch.bool)
+        heads[1, 0] = True
+        self.register_buffer("heads", heads.to_sparse(), persistent=False)
+
+
+def test_round_trip_keeps_ties_and_buffers(tmp_path):
+    path = str(tmp_path / "tied.safetensors")
+    original = TiedModel()
+    _save_state_dict(original, path)
+
+    loaded = _build_with_weights(TiedModel, *_load_state_dict(path))
+
+    assert loaded.head.weight.data_ptr() == loaded.embed.weight.data_ptr()
+    assert torch.equal(loaded.embed.weight, original.embed.weight)
+    assert not any(t.is_meta for t in list(loaded.parameters()) + list(loaded.buffers()))
+    assert torch.equal(loaded.mask, original.mask)
+    assert loaded.heads.is_sparse
+    assert torch.equal(loaded.heads.to_dense(), original.heads.to_dense())
+    assert "mask" not in loaded.state_dict()
+
+
+def test_build_falls_back_to_cpu_when_meta_fails(tmp_path):
+    path = str(tmp_path / "tied.safetensors")
+    _save_state_dict(TiedModel(), path)
+
+    def build():
+        if torch.empty(0).is_meta:
+            raise NotImplementedError("no meta support")
+        return TiedModel()
+
+    loaded = _build_with_weights(build, *_load_state_dict(path))
+
+    assert loaded.head.weight.data_ptr() == loaded.embed.weight.data_ptr()
+
+
+def test_second_wait_or_convert_does_not_convert_again(tmp_path):
+    path = tmp_path / "store" / "model.safetensors"
+    calls = []
+
+    def convert():
+        calls.append(path)
+        path.write_text("weights")
+
+    _wait_or_convert(str(path), convert)
+    _wait_or_convert(str(path), convert)
+
+    assert len(calls) == 1
+    assert not (tmp_path / "store" / "model.safetensors.lock").exists()
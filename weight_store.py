@@ -0,0 +1,207 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+import torch
+import whisper
+from whisper.model import ModelDimensions, Whisper
+from safetensors import safe_open
+from safetensors.torch import save_file, load_file
+from transformers import AutoConfig, AutoModelForSeq2SeqLM, AutoTokenizer, GenerationConfig, pipeline
+
+from file_locks import acquire_lock, atomic_replace, release_lock, LockHeartbeat
+
+# Anchored to this file so runs from any working directory share one store
+STORE_DIR = os.environ.get(
+    "MODEL_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_store")
+)
+CONVERT_STALE_AFTER = 120
+CONVERT_HEARTBEAT = 15
+SUMMARIZER_MODEL = "facebook/bart-large-cnn"
+
+# --- Saving and loading memory-mapped state dicts ---------------------------
+#
+# Checkpoints are converted once to safetensors. Loading maps the file
+# read-only and hands the mapped tensors straight to the model
+# (load_state_dict(assign=True)), so every process on the host shares the
+# same page-cache copy of the weights instead of holding its own.
+#
+# Non-persistent buffers (attention masks, alignment heads, ...) are not part
+# of a state dict. They are saved as the converted model had them, so loading
+# never has to rebuild them by hand.
+
+def _save_state_dict(model, path, metadata=None):
+    """Save a model's weights, storing tied tensors once plus an alias table"""
+    state_dict = model.state_dict()
+    tensors = {}
+    aliases = {}
+    seen = {}
+    for name, tensor in state_dict.items():
+        key = (tensor.data_ptr(), tensor.dtype, tuple(tensor.shape))
+        if key in seen:
+            aliases[name] = seen[key]
+            continue
+        seen[key] = name
+        tensors[name] = tensor.contiguous()
+
+    buffers = {}
+    for name, tensor in model.named_buffers():
+        if name in state_dict:
+            continue
+        buffers[name] = "sparse" if tensor.is_sparse else "dense"
+        tensors[name] = (tensor.to_dense() if tensor.is_sparse else tensor).contiguous()
+
+    metadata = dict(metadata or {})
+    metadata["aliases"] = json.dumps(aliases)
+    metadata["buffers"] = json.dumps(buffers)
+
+    with atomic_replace(path) as temp_path:
+        save_file(tensors, temp_path, metadata=metadata)
+
+def _read_metadata(path):
+    with safe_open(path, framework="pt") as f:
+        return f.metadata() or {}
+
+def _load_state_dict(path):
+    """Map a converted checkpoint read-only; returns its state dict and non-persistent buffers"""
+    state_dict = load_file(path, device="cpu")
+    metadata = _read_metadata(path)
+    for name, target in json.loads(metadata.get("aliases", "{}")).items():
+        state_dict[name] = state_dict[target]
+    buffers = {}
+    for name, layout in json.loads(metadata.get("buffers", "{}")).items():
+        tensor = state_dict.pop(name)
+        buffers[name] = tensor.to_sparse() if layout == "sparse" else tensor
+    return state_dict, buffers
+
+def _has_meta_tensors(model):
+    return any(t.is_meta for t in list(model.parameters()) + list(model.buffers()))
+
+def _set_buffer(model, name, tensor):
+    module_name, _, leaf = name.rpartition(".")
+    model.get_submodule(module_name).register_buffer(leaf, tensor, persistent=False)
+
+def _build_with_weights(build, state_dict, buffers=None):
+    """Build a model without allocating weights, then attach the mapped ones.
+
+    Falls back to an ordinary CPU build if something is left on the meta
+    device (e.g. a buffer the weight store does not carry).
+    """
+    for device in ("meta", "cpu"):
+        try:
+            with torch.device(device):
+                model = build()
+        except (NotImplementedError, RuntimeError):
+            if device == "cpu":
+                raise
+            continue  # Model cannot be built on the meta device
+        model.load_state_dict(state_dict, assign=True)
+        for name, tensor in (buffers or {}).items():
+            _set_buffer(model, name, tensor)
+        if not _has_meta_tensors(model):
+            return model.eval()
+    raise RuntimeError("Model still has unloaded tensors after loading the weight store")
+
+def _wait_or_convert(path, convert):
+    """Convert once per store; other processes wait for the finished file.
+
+    The converter keeps a heartbeat in the lock file, so a conversion that
+    was killed is taken over once its lock goes stale.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    lock_path = f"{path}.lock"
+    waiting = False
+    while not os.path.exists(path):
+        if acquire_lock(lock_path, CONVERT_STALE_AFTER):
+            try:
+                # Another process may have finished between our check and our claim
+                if not os.path.exists(path):
+                    with LockHeartbeat(lock_path, CONVERT_HEARTBEAT):
+                        convert()
+            finally:
+                release_lock(lock_path)
+            return
+        if not waiting:
+            print(f"[*] Waiting for another process to convert {path}...")
+            waiting = True
+        time.sleep(1)
+
+# --- Whisper ----------------------------------------------------------------
+
+def whisper_store_path(name, store_dir=STORE_DIR):
+    return os.path.join(store_dir, f"whisper-{name}.safetensors")
+
+def convert_whisper(name, store_dir=STORE_DIR):
+    """Convert a Whisper checkpoint into the weight store"""
+    path = whisper_store_path(name, store_dir)
+    print(f"[*] Converting Whisper '{name}' to {path}...")
+    model = whisper.load_model(name, device="cpu").float()
+    _save_state_dict(model, path, {"dims": json.dumps(model.dims.__dict__)})
+    return path
+
+def load_whisper_model(name="base", device="cpu", store_dir=STORE_DIR):
+    """Load Whisper with weights mapped from the shared store (FP32, CPU).
+
+    GPU loads go through whisper.load_model: device memory is not shared.
+    """
+    if device != "cpu":
+        return whisper.load_model(name, device=device)
+
+    path = whisper_store_path(name, store_dir)
+    _wait_or_convert(path, lambda: convert_whisper(name, store_dir))
+
+    dims = ModelDimensions(**json.loads(_read_metadata(path)["dims"]))
+    # The decoder mask and alignment heads come from the store, as whisper.load_model built them
+    return _build_with_weights(lambda: Whisper(dims), *_load_state_dict(path))
+
+# --- Summarizer -------------------------------------------------------------
+
+def summarizer_store_dir(model_name=SUMMARIZER_MODEL, store_dir=STORE_DIR):
+    return os.path.join(store_dir, model_name.replace("/", "--"))
+
+def convert_summarizer(model_name=SUMMARIZER_MODEL, store_dir=STORE_DIR):
+    """Convert a Hugging Face summarization checkpoint into the weight store"""
+    target_dir = summarizer_store_dir(model_name, store_dir)
+    print(f"[*] Converting {model_name} to {target_dir}...")
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+    # Config and tokenizer first: the weights file marks the conversion as done
+    model.config.save_pretrained(target_dir)
+    model.generation_config.save_pretrained(target_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(target_dir)
+    _save_state_dict(model, os.path.join(target_dir, "weights.safetensors"))
+    return target_dir
+
+def load_summarizer(model_name=SUMMARIZER_MODEL, store_dir=STORE_DIR):
+    """Summarization pipeline with weights mapped from the shared store"""
+    target_dir = summarizer_store_dir(model_name, store_dir)
+    weights_path = os.path.join(target_dir, "weights.safetensors")
+    _wait_or_convert(weights_path, lambda: convert_summarizer(model_name, store_dir))
+
+    config = AutoConfig.from_pretrained(target_dir)
+    model = _build_with_weights(
+        lambda: AutoModelForSeq2SeqLM.from_config(config),
+        *_load_state_dict(weights_path),
+    )
+    model.generation_config = GenerationConfig.from_pretrained(target_dir)
+    tokenizer = AutoTokenizer.from_pretrained(target_dir)
+    return pipeline("summarization", model=model, tokenizer=tokenizer, device=-1)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert model checkpoints into the shared weight store")
+    parser.add_argument("whisper_models", nargs="*", default=["base"], help="Whisper models to convert")
+    parser.add_argument("--store", default=STORE_DIR, help="Weight store directory")
+    parser.add_argument("--summarizer", default=SUMMARIZER_MODEL, help="Summarization model to convert")
+    args = parser.parse_args(argv)
+
+    for name in args.whisper_models:
+        _wait_or_convert(whisper_store_path(name, args.store), lambda: convert_whisper(name, args.store))
+    _wait_or_convert(
+        os.path.join(summarizer_store_dir(args.summarizer, args.store), "weights.safetensors"),
+        lambda: convert_summarizer(args.summarizer, args.store),
+    )
+    print(f"[✓] Weight store ready in {args.store}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])